@@ -1,6 +1,8 @@
 """
 Fit a circle through 3 points in 3D space.
 """
+import math
+
 import numpy as np
 
 
@@ -19,61 +21,74 @@ def fit_circle_3d(p1, p2, p3):
             - basis_u: unit vector from center to p1
             - basis_w: unit vector perpendicular to normal and basis_u
     """
-    p1 = np.array(p1, dtype=np.float64)
-    p2 = np.array(p2, dtype=np.float64)
-    p3 = np.array(p3, dtype=np.float64)
-
-    v1 = p2 - p1
-    v2 = p3 - p1
-
-    # Normal to the plane defined by p1, p2, p3
-    normal = np.cross(v1, v2)
-    norm_mag = np.linalg.norm(normal)
+    # The inputs are single 3-vectors, so the math is done on plain floats:
+    # numpy's per-call dispatch costs far more than the arithmetic itself.
+    x1, y1, z1 = (float(c) for c in p1)
+    x2, y2, z2 = (float(c) for c in p2)
+    x3, y3, z3 = (float(c) for c in p3)
+
+    # v1 = p2 - p1, v2 = p3 - p1
+    ax, ay, az = x2 - x1, y2 - y1, z2 - z1
+    bx, by, bz = x3 - x1, y3 - y1, z3 - z1
+
+    # Normal to the plane defined by p1, p2, p3 (v1 x v2)
+    nx = ay * bz - az * by
+    ny = az * bx - ax * bz
+    nz = ax * by - ay * bx
+    norm_mag = math.sqrt(nx * nx + ny * ny + nz * nz)
 
     if norm_mag < 1e-10:
         return None  # Collinear points
 
-    normal = normal / norm_mag
+    nx, ny, nz = nx / norm_mag, ny / norm_mag, nz / norm_mag
 
     # Create a local coordinate system on the plane
     # u = v1 normalized
-    u = v1 / np.linalg.norm(v1)
+    v1_mag = math.sqrt(ax * ax + ay * ay + az * az)
+    ux, uy, uz = ax / v1_mag, ay / v1_mag, az / v1_mag
     # w = normal x u (perpendicular to both)
-    w = np.cross(normal, u)
+    wx = ny * uz - nz * uy
+    wy = nz * ux - nx * uz
+    wz = nx * uy - ny * ux
 
     # Project points to 2D local plane (origin at p1)
     # p1_2d = (0, 0)
-    p2_2d = np.array([np.dot(p2 - p1, u), np.dot(p2 - p1, w)])
-    p3_2d = np.array([np.dot(p3 - p1, u), np.dot(p3 - p1, w)])
+    p2_2d = (ax * ux + ay * uy + az * uz, ax * wx + ay * wy + az * wz)
+    p3_2d = (bx * ux + by * uy + bz * uz, bx * wx + by * wy + bz * wz)
 
     # Solve for circumcenter in 2D
     # Using the formula: solve the linear system for center (cx, cy)
     # 2*x2*cx + 2*y2*cy = x2^2 + y2^2
     # 2*x3*cx + 2*y3*cy = x3^2 + y3^2
+    # in closed form (Cramer's rule)
 
-    A = np.array([
-        [2 * p2_2d[0], 2 * p2_2d[1]],
-        [2 * p3_2d[0], 2 * p3_2d[1]]
-    ])
-    b = np.array([
-        p2_2d[0]**2 + p2_2d[1]**2,
-        p3_2d[0]**2 + p3_2d[1]**2
-    ])
-
-    try:
-        center_2d = np.linalg.solve(A, b)
-    except np.linalg.LinAlgError:
+    a00, a01 = 2 * p2_2d[0], 2 * p2_2d[1]
+    a10, a11 = 2 * p3_2d[0], 2 * p3_2d[1]
+    b0 = p2_2d[0]**2 + p2_2d[1]**2
+    b1 = p3_2d[0]**2 + p3_2d[1]**2
+
+    det = a00 * a11 - a01 * a10
+    if abs(det) < 1e-20:
         return None
 
+    cx = (b0 * a11 - b1 * a01) / det
+    cy = (a00 * b1 - a10 * b0) / det
+
     # Radius
-    radius = np.linalg.norm(center_2d)
+    radius = math.hypot(cx, cy)
 
     # Transform center back to 3D
-    center = p1 + center_2d[0] * u + center_2d[1] * w
+    center = (x1 + cx * ux + cy * wx,
+              y1 + cx * uy + cy * wy,
+              z1 + cx * uz + cy * wz)
 
     # Compute basis vectors from center
-    basis_u = (p1 - center)
-    basis_u = basis_u / np.linalg.norm(basis_u)
-    basis_w = np.cross(normal, basis_u)
-
-    return center, radius, normal, basis_u, basis_w
+    bux, buy, buz = x1 - center[0], y1 - center[1], z1 - center[2]
+    bu_mag = math.sqrt(bux * bux + buy * buy + buz * buz)
+    bux, buy, buz = bux / bu_mag, buy / bu_mag, buz / bu_mag
+    basis_w = (ny * buz - nz * buy,
+               nz * bux - nx * buz,
+               nx * buy - ny * bux)
+
+    return (np.array(center), radius, np.array((nx, ny, nz)),
+            np.array((bux, buy, buz)), np.array(basis_w))
@@ -1,6 +1,9 @@
 """
 Generate a torus segment mesh that sweeps through 3 points.
 """
+import functools
+import math
+
 import numpy as np
 import trimesh
 
@@ -9,42 +12,115 @@ def get_angle(p, center, basis_u, basis_w):
     """
     Returns angle of point p relative to center in basis (u, w) in [0, 2pi).
     """
-    vec = p - center
-    x = np.dot(vec, basis_u)
-    y = np.dot(vec, basis_w)
-    return np.arctan2(y, x) % (2 * np.pi)
+    # Scalar dot products: cheaper than np.dot dispatch on 3-vectors
+    vx, vy, vz = p[0] - center[0], p[1] - center[1], p[2] - center[2]
+    x = vx * basis_u[0] + vy * basis_u[1] + vz * basis_u[2]
+    y = vx * basis_w[0] + vy * basis_w[1] + vz * basis_w[2]
+    angle = math.atan2(y, x)
+    return angle if angle >= 0 else angle + 2 * math.pi
 
 
-def generate_torus_segment(center, normal, major_radius, minor_radius,
-                           p1, p2, p3, resolution=64):
+@functools.lru_cache(maxsize=8)
+def _torus_faces(n_minor, n_major):
     """
-    Generates a torus segment mesh passing through p1 -> p2 -> p3.
+    Returns the face indices of an (n_minor, n_major) torus grid followed by
+    the start and end cap fans, all wound to face outward. Vertices
+    n_minor * n_major and n_minor * n_major + 1 are the start and end cap
+    centers.
+
+    The result is cached per grid size and read-only.
+    """
+    n_grid = n_minor * n_major
+
+    # Grid faces followed by the start and end cap fans, allocated once
+    n_grid_faces = 2 * n_minor * (n_major - 1)
+    all_faces = np.empty((n_grid_faces + 2 * n_minor, 3), dtype=np.int64)
+
+    # Generate faces (grid topology)
+    # Indices (row-major: i * n_major + j), ring i wraps around to ring 0
+    i = np.arange(n_minor)[:, None]
+    j = np.arange(n_major - 1)[None, :]
+    i1 = (i + 1) % n_minor
+
+    idx00 = i * n_major + j
+    idx01 = i * n_major + j + 1
+    idx10 = i1 * n_major + j
+    idx11 = i1 * n_major + j + 1
+
+    # Two triangles per quad: (00, 01, 11) and (00, 11, 10)
+    grid_faces = all_faces[:n_grid_faces].reshape(n_minor, n_major - 1, 2, 3)
+    grid_faces[..., 0, 0] = idx00
+    grid_faces[..., 0, 1] = idx01
+    grid_faces[..., 0, 2] = idx11
+    grid_faces[..., 1, 0] = idx00
+    grid_faces[..., 1, 1] = idx11
+    grid_faces[..., 1, 2] = idx10
+
+    # Add end caps to make watertight
+    ring = np.arange(n_minor)
+    ring_next = np.roll(ring, -1)
+
+    # Start cap (at theta=0)
+    # Triangle: center -> current -> next (CCW when viewed from outside)
+    start_cap_faces = all_faces[n_grid_faces:n_grid_faces + n_minor]
+    start_cap_faces[:, 0] = n_grid
+    start_cap_faces[:, 1] = ring * n_major
+    start_cap_faces[:, 2] = ring_next * n_major
+
+    # End cap (at theta=total_sweep)
+    # Triangle: center -> next -> current (CCW when viewed from outside)
+    end_cap_faces = all_faces[n_grid_faces + n_minor:]
+    end_cap_faces[:, 0] = n_grid + 1
+    end_cap_faces[:, 1] = ring_next * n_major + (n_major - 1)
+    end_cap_faces[:, 2] = ring * n_major + (n_major - 1)
+
+    all_faces.flags.writeable = False
+    return all_faces
+
+
+def torus_segment_arrays(center, normal, major_radius, minor_radius,
+                         points, resolution=64, dtype=np.float64):
+    """
+    Builds the vertex and face arrays of a torus segment passing through
+    p1 -> p2 -> p3.
 
     Args:
         center: 3D center point of the torus
         normal: unit normal vector to the torus plane
         major_radius: radius from center to tube center
         minor_radius: radius of the tube
-        p1, p2, p3: the 3 points defining the arc
+        points: (3, 3) array-like, rows p1, p2, p3 defining the arc
         resolution: mesh resolution
+        dtype: float dtype of the vertex pipeline; np.float32 halves the
+            memory traffic and is accurate enough for previews
 
     Returns:
-        trimesh.Trimesh: the torus segment mesh (watertight with end caps)
+        tuple: (vertices, faces) of the watertight segment with end caps
+            - vertices: (n, 3) array of the given dtype
+            - faces: (m, 3) int64 array, wound outward; shared between
+              calls with the same grid size, so it is read-only
     """
-    p1 = np.array(p1, dtype=np.float64)
-    p2 = np.array(p2, dtype=np.float64)
-    p3 = np.array(p3, dtype=np.float64)
-    center = np.array(center, dtype=np.float64)
-    normal = np.array(normal, dtype=np.float64)
-
-    # Establish basis vectors
-    u = (p1 - center)
-    u = u / np.linalg.norm(u)
-    w = np.cross(normal, u)
+    # No copies when the inputs are already float64 arrays (fit_circle_3d
+    # output, stacked picked points)
+    p1, p2, p3 = np.asarray(points, dtype=np.float64).tolist()
+    center = np.asarray(center, dtype=np.float64)
+    normal = np.asarray(normal, dtype=np.float64)
+
+    # Establish basis vectors (scalar math, as in fit_circle_3d)
+    cx, cy, cz = center.tolist()
+    nx, ny, nz = normal.tolist()
+    x1, y1, z1 = p1
+    ux, uy, uz = x1 - cx, y1 - cy, z1 - cz
+    u_mag = math.sqrt(ux * ux + uy * uy + uz * uz)
+    u = (ux / u_mag, uy / u_mag, uz / u_mag)
+    # w = normal x u
+    w = (ny * u[2] - nz * u[1],
+         nz * u[0] - nx * u[2],
+         nx * u[1] - ny * u[0])
 
     # Calculate angles for p2 and p3 relative to p1 (theta1 = 0)
-    theta2 = get_angle(p2, center, u, w)
-    theta3 = get_angle(p3, center, u, w)
+    theta2 = get_angle(p2, (cx, cy, cz), u, w)
+    theta3 = get_angle(p3, (cx, cy, cz), u, w)
 
     # Determine sweep: we want to go from 0 to theta3, passing through theta2
     # If theta2 > theta3, we need to wrap around
@@ -58,82 +134,71 @@ def generate_torus_segment(center, normal, major_radius, minor_radius,
     n_major = max(int(resolution * (total_sweep / (2 * np.pi))), 8) + 1
     n_minor = max(resolution // 2, 16)
 
-    theta = np.linspace(0, total_sweep, n_major)
-    phi = np.linspace(0, 2 * np.pi, n_minor, endpoint=False)
+    theta = np.linspace(0, total_sweep, n_major, dtype=dtype)
+    phi = np.linspace(0, 2 * np.pi, n_minor, endpoint=False, dtype=dtype)
 
-    # Grid of angles
-    Theta, Phi = np.meshgrid(theta, phi)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    cos_p, sin_p = np.cos(phi), np.sin(phi)
 
-    # Parametric torus in local coordinates
+    # Parametric torus in local coordinates. Rows are phi, columns are
+    # theta; broadcasting (n_minor, 1) against (n_major,) avoids a meshgrid.
     # Radial distance from center in the major plane
-    rc = major_radius + minor_radius * np.cos(Phi)
+    rc = major_radius + minor_radius * cos_p[:, None]
 
-    # Components along basis vectors
-    comp_u = rc * np.cos(Theta)
-    comp_w = rc * np.sin(Theta)
-    comp_n = minor_radius * np.sin(Phi)
+    # Components along basis vectors (u, w, n), written straight into the
+    # grid so no full-size temporaries are stacked
+    comps = np.empty((n_minor, n_major, 3), dtype=dtype)
+    comps[..., 0] = rc * cos_t
+    comps[..., 1] = rc * sin_t
+    comps[..., 2] = (minor_radius * sin_p)[:, None]
+    comps = comps.reshape(-1, 3)
 
-    # Construct vertices in 3D
-    vx = center[0] + comp_u * u[0] + comp_w * w[0] + comp_n * normal[0]
-    vy = center[1] + comp_u * u[1] + comp_w * w[1] + comp_n * normal[1]
-    vz = center[2] + comp_u * u[2] + comp_w * w[2] + comp_n * normal[2]
+    # Grid vertices followed by the two cap centers, allocated once
+    n_grid = n_minor * n_major
+    vertices = np.empty((n_grid + 2, 3), dtype=dtype)
 
-    vertices = np.stack([vx.ravel(), vy.ravel(), vz.ravel()], axis=1)
+    # Construct vertices in 3D: map local components through the basis with
+    # a single matrix multiply, written in place
+    basis = np.array([u, w, normal], dtype=dtype)
+    grid_vertices = vertices[:n_grid]
+    np.matmul(comps, basis, out=grid_vertices)
+    grid_vertices += center
 
-    # Generate faces (grid topology)
-    faces = []
-    for i in range(n_minor):
-        for j in range(n_major - 1):
-            # Indices (row-major: i * n_major + j)
-            r0 = i
-            r1 = (i + 1) % n_minor
-            c0 = j
-            c1 = j + 1
-
-            idx00 = r0 * n_major + c0
-            idx10 = r1 * n_major + c0
-            idx01 = r0 * n_major + c1
-            idx11 = r1 * n_major + c1
-
-            # Two triangles per quad
-            faces.append([idx00, idx01, idx11])
-            faces.append([idx00, idx11, idx10])
-
-    faces = np.array(faces)
+    # Cap centers on the tube axis at theta=0 and theta=total_sweep; the
+    # end direction reuses the last grid column's cos/sin
+    cap_dirs = np.array([[1.0, 0.0], [cos_t[-1], sin_t[-1]]])
+    vertices[n_grid:] = center + major_radius * (cap_dirs @ basis[:2])
 
-    # Add end caps to make watertight
-    n_verts = len(vertices)
+    # The topology depends only on the grid size
+    return vertices, _torus_faces(n_minor, n_major)
 
-    # Start cap (at theta=0)
-    start_center = center + major_radius * u
-    vertices = np.vstack([vertices, start_center])
-    start_center_idx = n_verts
-
-    start_cap_faces = []
-    for i in range(n_minor):
-        i_next = (i + 1) % n_minor
-        idx0 = i * n_major  # vertex at theta=0, phi=i
-        idx1 = i_next * n_major
-        # Triangle: center -> idx1 -> idx0 (CCW when viewed from outside)
-        start_cap_faces.append([start_center_idx, idx1, idx0])
 
-    # End cap (at theta=total_sweep)
-    end_u = np.cos(total_sweep) * u + np.sin(total_sweep) * w
-    end_center = center + major_radius * end_u
-    vertices = np.vstack([vertices, end_center])
-    end_center_idx = n_verts + 1
+def to_trimesh(vertices, faces):
+    """
+    Wraps torus segment arrays in a trimesh.Trimesh.
+
+    Args:
+        vertices, faces: arrays as returned by torus_segment_arrays
 
-    end_cap_faces = []
-    for i in range(n_minor):
-        i_next = (i + 1) % n_minor
-        idx0 = i * n_major + (n_major - 1)  # vertex at theta=end, phi=i
-        idx1 = i_next * n_major + (n_major - 1)
-        # Triangle: center -> idx0 -> idx1 (CCW when viewed from outside)
-        end_cap_faces.append([end_center_idx, idx0, idx1])
+    Returns:
+        trimesh.Trimesh: the torus segment mesh
+    """
+    # Faces are wound outward by construction, so no fix_normals pass;
+    # copy them since the cached array is read-only
+    return trimesh.Trimesh(vertices=vertices, faces=faces.copy())
 
-    all_faces = np.vstack([faces, start_cap_faces, end_cap_faces])
 
-    mesh = trimesh.Trimesh(vertices=vertices, faces=all_faces)
-    mesh.fix_normals()
+def generate_torus_segment(center, normal, major_radius, minor_radius,
+                           points, resolution=64, dtype=np.float64):
+    """
+    Generates a torus segment mesh passing through p1 -> p2 -> p3.
 
-    return mesh
+    Takes the same arguments as torus_segment_arrays.
+
+    Returns:
+        trimesh.Trimesh: the torus segment mesh (watertight with end caps)
+    """
+    return to_trimesh(*torus_segment_arrays(
+        center, normal, major_radius, minor_radius, points,
+        resolution=resolution, dtype=dtype
+    ))
@@ -1,6 +1,8 @@
 """
 Main GUI viewer widget using PySide6 and PyVista.
 """
+from collections import OrderedDict
+
 import numpy as np
 import pyvista as pv
 import trimesh
@@ -8,13 +10,19 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QSlider, QFileDialog, QGroupBox, QMessageBox
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from pyvistaqt import QtInteractor
 
 from geometry.circle_fit import fit_circle_3d
-from geometry.torus_generator import generate_torus_segment
+from geometry.torus_generator import torus_segment_arrays, to_trimesh
 from operations.boolean_ops import subtract_meshes, check_mesh_validity
 
+# Number of recently generated torus arrays kept for reuse
+TORUS_CACHE_SIZE = 16
+
+# Delay before a slider change rebuilds the preview (ms)
+PREVIEW_DEBOUNCE_MS = 50
+
 
 class TorusToolViewer(QWidget):
     """Main viewer widget with 3D viewport and controls."""
@@ -25,13 +33,33 @@ class TorusToolViewer(QWidget):
         # Data
         self.source_mesh_pv = None      # PyVista PolyData for display
         self.source_mesh_tri = None     # Trimesh for operations
+        self._target_manifold = None    # Its Manifold, after a subtraction
+        self.source_actor = None        # Actor displaying source_mesh_pv
         self.preview_actor = None       # Actor for torus preview
-        self.picked_points = []         # List of picked 3D points
+        self._preview_polydata = None   # PolyData shown by preview_actor
+        self._preview_faces = None      # Faces array it was built from
+        self.picked_points = np.empty((3, 3))  # Picked 3D points (rows)
+        self.n_picked = 0               # Number of rows filled
+        self._circle_cache = None       # fit_circle_3d of the 3 points
+        self._picking_locked = False    # Ignore picks during preview builds
         self.point_actors = []          # Actors for point markers
 
         self.minor_radius = 2.0
         self.marker_scale = 1.0
 
+        # Unit sphere shared by all point markers, placed via user_matrix
+        self._marker_sphere = pv.Sphere(radius=1.0)
+
+        # (points bytes, rounded radius, dtype) -> torus (vertices, faces),
+        # least recently used first
+        self._torus_cache = OrderedDict()
+
+        # Coalesces slider ticks so only the last value in a drag is built
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(PREVIEW_DEBOUNCE_MS)
+        self._preview_timer.timeout.connect(self._show_preview)
+
         self._setup_ui()
 
     def _setup_ui(self):
@@ -129,6 +157,7 @@ class TorusToolViewer(QWidget):
             self.source_mesh_pv = pv.read(path)
             # Load with trimesh for operations
             self.source_mesh_tri = trimesh.load(path)
+            self._target_manifold = None
 
             # Calculate marker scale based on model size
             bounds = self.source_mesh_pv.bounds
@@ -146,7 +175,7 @@ class TorusToolViewer(QWidget):
 
             # Display
             self.plotter.clear()
-            self.plotter.add_mesh(
+            self.source_actor = self.plotter.add_mesh(
                 self.source_mesh_pv,
                 color='white',
                 opacity=1.0,
@@ -170,39 +199,53 @@ class TorusToolViewer(QWidget):
 
     def _on_point_picked(self, point):
         """Handle point picking on mesh surface."""
-        if len(self.picked_points) >= 3:
+        if self._picking_locked or self.n_picked >= 3:
             return
 
-        self.picked_points.append(np.array(point))
+        # Drop repeated events for the same pick
+        if self.n_picked:
+            last_point = self.picked_points[self.n_picked - 1]
+            if np.linalg.norm(np.asarray(point) - last_point) < 1e-6:
+                return
+
+        self.picked_points[self.n_picked] = point
+        self.n_picked += 1
 
         # Add marker sphere
         colors = ['red', 'green', 'blue']
-        color = colors[len(self.picked_points) - 1]
-        sphere = pv.Sphere(radius=self.marker_scale * 2, center=point)
+        color = colors[self.n_picked - 1]
+        marker_matrix = np.diag([self.marker_scale * 2] * 3 + [1.0])
+        marker_matrix[:3, 3] = point
         actor = self.plotter.add_mesh(
-            sphere,
+            self._marker_sphere,
             color=color,
-            name=f'point_marker_{len(self.picked_points)}'
+            name=f'point_marker_{self.n_picked}',
+            user_matrix=marker_matrix
         )
         self.point_actors.append(actor)
 
         # Update labels
         self._update_point_labels()
 
-        if len(self.picked_points) == 3:
+        if self.n_picked == 3:
+            # The circle depends only on the points, not the tube radius
+            self._circle_cache = fit_circle_3d(*self.picked_points)
             self.lbl_status.setText("3 points selected. Preview or adjust radius.")
             self.btn_preview.setEnabled(True)
-            self._show_preview()
+            # Let the pick finish and repaint before building the preview;
+            # a slider drag in progress will schedule its own
+            if not self.slider_radius.isSliderDown():
+                QTimer.singleShot(0, self._show_preview)
         else:
             self.lbl_status.setText(
-                f"Click on mesh to place Point {len(self.picked_points) + 1}"
+                f"Click on mesh to place Point {self.n_picked + 1}"
             )
 
     def _update_point_labels(self):
         """Update the point coordinate labels."""
         labels = [self.lbl_point1, self.lbl_point2, self.lbl_point3]
         for i, lbl in enumerate(labels):
-            if i < len(self.picked_points):
+            if i < self.n_picked:
                 p = self.picked_points[i]
                 lbl.setText(f"Point {i+1}: ({p[0]:.1f}, {p[1]:.1f}, {p[2]:.1f})")
             else:
@@ -210,7 +253,9 @@ class TorusToolViewer(QWidget):
 
     def _clear_points(self):
         """Clear all picked points."""
-        self.picked_points = []
+        self.n_picked = 0
+        self._circle_cache = None
+        self._preview_timer.stop()
 
         # Remove point markers
         for i in range(3):
@@ -220,6 +265,8 @@ class TorusToolViewer(QWidget):
         # Remove preview
         self.plotter.remove_actor('torus_preview')
         self.preview_actor = None
+        self._preview_polydata = None
+        self._preview_faces = None
 
         self.btn_preview.setEnabled(False)
         self.btn_subtract.setEnabled(False)
@@ -234,56 +281,87 @@ class TorusToolViewer(QWidget):
         self.minor_radius = val
         self.lbl_radius_val.setText(f"{val:.1f}")
 
-        # Update preview if 3 points are selected
-        if len(self.picked_points) == 3:
-            self._show_preview()
+        # Update preview if 3 points are selected, once the slider settles
+        if self.n_picked == 3:
+            self._preview_timer.start()
 
-    def _calculate_torus(self):
-        """Calculate torus mesh from picked points."""
-        if len(self.picked_points) != 3:
+    def _calculate_torus(self, dtype=np.float64):
+        """Calculate torus (vertices, faces) arrays from picked points."""
+        if self.n_picked != 3:
             return None
 
-        result = fit_circle_3d(*self.picked_points)
-        if result is None:
+        key = (self.picked_points.tobytes(), round(self.minor_radius, 2),
+               np.dtype(dtype).str)
+        torus = self._torus_cache.get(key)
+        if torus is not None:
+            self._torus_cache.move_to_end(key)
+            return torus
+
+        if self._circle_cache is None:
             self.lbl_status.setText("Error: Points are collinear!")
             return None
 
-        center, major_radius, normal, _, _ = result
+        center, major_radius, normal, _, _ = self._circle_cache
 
-        torus_mesh = generate_torus_segment(
+        torus = torus_segment_arrays(
             center, normal, major_radius, self.minor_radius,
-            *self.picked_points
+            self.picked_points, dtype=dtype
         )
 
-        return torus_mesh
+        self._torus_cache[key] = torus
+        if len(self._torus_cache) > TORUS_CACHE_SIZE:
+            self._torus_cache.popitem(last=False)
+
+        return torus
 
     def _show_preview(self):
         """Show torus preview overlay."""
-        torus_mesh = self._calculate_torus()
-        if torus_mesh is None:
+        self._picking_locked = True
+        try:
+            self._update_preview()
+        finally:
+            self._picking_locked = False
+
+    def _update_preview(self):
+        """Build and display the torus preview."""
+        # Single precision is plenty for a translucent overlay
+        torus = self._calculate_torus(dtype=np.float32)
+        if torus is None:
             return
 
-        # Convert trimesh to PyVista
-        pv_mesh = pv.wrap(torus_mesh)
+        vertices, faces = torus
+        self.btn_subtract.setEnabled(True)
+
+        # Faces are shared per grid size, so the same array means the same
+        # topology: only move the points of the existing preview
+        if (self._preview_polydata is not None
+                and faces is self._preview_faces):
+            self._preview_polydata.points = vertices
+            self.plotter.render()
+            return
+
+        # Build the PyVista mesh straight from the arrays; only the
+        # subtraction needs a trimesh
+        self._preview_polydata = pv.PolyData.from_regular_faces(vertices, faces)
+        self._preview_faces = faces
 
         # Remove old preview
         self.plotter.remove_actor('torus_preview')
 
         # Add new preview
         self.preview_actor = self.plotter.add_mesh(
-            pv_mesh,
+            self._preview_polydata,
             color='orange',
             opacity=0.5,
             name='torus_preview'
         )
 
-        self.btn_subtract.setEnabled(True)
-
     def _perform_subtraction(self):
         """Perform boolean subtraction."""
-        torus_mesh = self._calculate_torus()
-        if torus_mesh is None:
+        torus = self._calculate_torus()
+        if torus is None:
             return
+        torus_mesh = to_trimesh(*torus)
 
         self.lbl_status.setText("Processing boolean subtraction...")
         self.repaint()
@@ -296,7 +374,11 @@ class TorusToolViewer(QWidget):
                 f"Source mesh has issues: {msg}\nAttempting operation anyway."
             )
 
-        result = subtract_meshes(self.source_mesh_tri, torus_mesh)
+        result, result_manifold = subtract_meshes(
+            self.source_mesh_tri, torus_mesh,
+            target_manifold=self._target_manifold,
+            return_manifold=True
+        )
 
         if result is None or result.is_empty:
             QMessageBox.critical(
@@ -308,27 +390,15 @@ class TorusToolViewer(QWidget):
 
         # Update meshes
         self.source_mesh_tri = result
+        self._target_manifold = result_manifold
         self.source_mesh_pv = pv.wrap(result)
 
-        # Redisplay
-        self.plotter.clear()
-        self.plotter.add_mesh(
-            self.source_mesh_pv,
-            color='white',
-            opacity=1.0,
-            name='source_mesh'
-        )
-        self.plotter.add_axes()
-
-        # Re-enable picking
-        self.plotter.enable_point_picking(
-            callback=self._on_point_picked,
-            use_mesh=True,
-            show_message=False,
-            show_point=False
-        )
+        # Redisplay by swapping the source actor's dataset; the rest of the
+        # scene (axes, picking) stays as it is
+        self.source_actor.mapper.dataset = self.source_mesh_pv
 
         self._clear_points()
+        self.plotter.render()
         self.lbl_status.setText("Subtraction complete! Click to add more points.")
 
     def _export_stl(self):
@@ -1,6 +1,7 @@
 """
 Web-based GUI viewer using Trame and PyVista.
 """
+import math
 import os
 import numpy as np
 import pyvista as pv
@@ -11,9 +12,43 @@ from trame.ui.vuetify3 import SinglePageLayout
 from trame.widgets import vuetify3 as vuetify, vtk as vtk_widgets, html
 
 from geometry.circle_fit import fit_circle_3d
-from geometry.torus_generator import generate_torus_segment
+from geometry.torus_generator import torus_segment_arrays, to_trimesh
 from operations.boolean_ops import subtract_meshes
 
+# Torus tessellation for the translucent preview and for the actual cut
+PREVIEW_RESOLUTION = 32
+SUBTRACT_RESOLUTION = 64
+
+
+def _tri_faces_to_pv(faces_u32):
+    """
+    Returns (n, 3) uint32 triangle faces as PyVista connectivity.
+
+    PyVista adopts int32 connectivity without copying, so the faces are
+    reinterpreted in place rather than converted to a padded [3, i, j, k]
+    buffer; indices stay below 2**31, where both dtypes agree.
+    """
+    return faces_u32.view(np.int32)
+
+
+def _is_near_collinear(points, tol=1e-3):
+    """
+    Returns True if the sine of the angle at points[0] is at most tol,
+    including when points coincide.
+
+    The test is scale-free, and a triangle that is nearly flat has a
+    nearly zero or nearly straight angle at every corner.
+    """
+    (x1, y1, z1), (x2, y2, z2), (x3, y3, z3) = points.tolist()
+    ax, ay, az = x2 - x1, y2 - y1, z2 - z1
+    bx, by, bz = x3 - x1, y3 - y1, z3 - z1
+    cross = math.sqrt((ay * bz - az * by) ** 2 +
+                      (az * bx - ax * bz) ** 2 +
+                      (ax * by - ay * bx) ** 2)
+    lengths = math.sqrt((ax * ax + ay * ay + az * az) *
+                        (bx * bx + by * by + bz * bz))
+    return cross <= tol * lengths
+
 
 class TorusToolApp:
     """Web-based torus subtraction tool."""
@@ -40,8 +75,26 @@ class TorusToolApp:
         # Data
         self.source_mesh_pv = None
         self.source_mesh_tri = None
+        self._source_actor = None
+        # float32 / uint32 copies of the source mesh, shared by the display
+        # mesh and the manifold3d conversion
+        self._verts_f32 = None
+        self._faces_u32 = None
+        # manifold3d.Manifold of the source mesh when it came from a
+        # subtraction, reused as the target of the next one
+        self._target_manifold = None
         self.picked_points = []
         self.marker_scale = 1.0
+        # Coarse unit sphere shared by all point markers, placed via user_matrix
+        self._marker_template = pv.Sphere(
+            radius=1.0, theta_resolution=12, phi_resolution=10
+        )
+
+        # Last torus built per level of detail: preview_lod ->
+        # (key, (vertices, faces), preview PolyData or None), where key is
+        # (points bytes, minor radius)
+        self._torus_cache = {}
+        self._preview_radius = None     # Radius the preview was built with
 
         # PyVista plotter (offscreen for web)
         pv.OFF_SCREEN = True
@@ -54,6 +107,14 @@ class TorusToolApp:
         # Build UI
         self._build_ui()
 
+        # Drop the kept Manifold when the server stops, before manifold3d
+        # itself is torn down at interpreter exit
+        self.ctrl.on_server_exited.add(self._on_server_exited)
+
+    def _on_server_exited(self, **kwargs):
+        """Release the manifold3d.Manifold kept for the source mesh."""
+        self._target_manifold = None
+
     def _build_ui(self):
         """Build the web UI."""
         with SinglePageLayout(self.server) as layout:
@@ -191,27 +252,19 @@ class TorusToolApp:
 
     def _load_stl_file(self, path):
         """Load STL file from path."""
-        self.source_mesh_pv = pv.read(path)
-        self.source_mesh_tri = trimesh.load(path)
+        # Parse once with trimesh; the display mesh is built from its buffers
+        self._set_source_mesh(trimesh.load(path))
 
         # Calculate marker scale
-        bounds = self.source_mesh_pv.bounds
-        diag = np.sqrt(
-            (bounds[1] - bounds[0])**2 +
-            (bounds[3] - bounds[2])**2 +
-            (bounds[5] - bounds[4])**2
-        )
+        bounds = np.asarray(self.source_mesh_pv.bounds).reshape(3, 2)
+        diag = float(np.linalg.norm(bounds[:, 1] - bounds[:, 0]))
         self.marker_scale = diag / 50
         self.state.minor_radius = max(diag / 30, 0.5)
 
         # Display
         self.plotter.clear()
-        
-        # Ensure normals are computed for better shading
-        if self.source_mesh_pv.point_normals is None:
-            self.source_mesh_pv.compute_normals(inplace=True)
 
-        self.plotter.add_mesh(
+        self._source_actor = self.plotter.add_mesh(
             self.source_mesh_pv,
             color='lightgrey',
             smooth_shading=True,
@@ -232,11 +285,42 @@ class TorusToolApp:
         )
 
         self.plotter.reset_camera()
-        self._clear_points_internal()
-        self.state.can_export = True
-        self.state.status_message = "Model loaded! Click on mesh to place Point 1"
+        with self.state:
+            self._clear_points_internal()
+            self.state.can_export = True
+            self.state.status_message = "Model loaded! Click on mesh to place Point 1"
         self.ctrl.view_update()
 
+    def _set_source_mesh(self, mesh, manifold=None):
+        """
+        Makes mesh the source mesh and rebuilds its display mesh.
+
+        The vertices and faces are converted to float32 / uint32 once; the
+        display mesh shares those buffers and subtract_meshes reuses them
+        for its manifold3d conversion.
+
+        manifold is the mesh's manifold3d.Manifold, if known; any Manifold
+        kept for the previous source mesh is dropped.
+        """
+        self.source_mesh_tri = mesh
+        self._target_manifold = manifold
+        self._verts_f32 = np.ascontiguousarray(mesh.vertices, dtype=np.float32)
+        self._faces_u32 = np.ascontiguousarray(mesh.faces, dtype=np.uint32)
+        self.source_mesh_pv = pv.PolyData.from_regular_faces(
+            self._verts_f32, _tri_faces_to_pv(self._faces_u32)
+        )
+
+        # Point normals for smooth shading. add_mesh only adds them to its
+        # own copy, and a dataset swapped into the mapper bypasses that.
+        # They are computed on a separate output and only the normals array
+        # is copied over, since computing in place would replace the shared
+        # connectivity
+        normals = self.source_mesh_pv.compute_normals(
+            cell_normals=False, split_vertices=False
+        ).point_data['Normals']
+        self.source_mesh_pv.point_data['Normals'] = normals
+        self.source_mesh_pv.point_data.active_normals_name = 'Normals'
+
     def _on_point_picked(self, point):
         """Handle point picking."""
         if point is None:
@@ -256,29 +340,32 @@ class TorusToolApp:
         # Add marker
         colors = ['red', 'green', 'blue']
         color = colors[len(self.picked_points) - 1]
-        sphere = pv.Sphere(radius=self.marker_scale, center=point)
+        marker_matrix = np.diag([self.marker_scale] * 3 + [1.0])
+        marker_matrix[:3, 3] = point
         self.plotter.add_mesh(
-            sphere,
+            self._marker_template,
             color=color,
-            name=f'point_marker_{len(self.picked_points)}'
+            name=f'point_marker_{len(self.picked_points)}',
+            user_matrix=marker_matrix
         )
 
-        # Update state
-        self._update_point_labels()
-        self.state.points_count = len(self.picked_points)
+        # Update state; picks come from VTK rather than a Trame trigger, so
+        # push all changes in one flush on leaving the block
+        with self.state:
+            self._update_point_labels()
+            self.state.points_count = len(self.picked_points)
 
-        if len(self.picked_points) == 3:
-            self.state.status_message = "3 points selected! Click Preview or Subtract"
-            self.state.can_preview = True
-            self._show_preview()
-        else:
-            self.state.status_message = f"Click to place Point {len(self.picked_points) + 1}"
+            if len(self.picked_points) == 3:
+                self.state.status_message = "3 points selected! Click Preview or Subtract"
+                self.state.can_preview = True
+                self._update_preview()
+            else:
+                self.state.status_message = f"Click to place Point {len(self.picked_points) + 1}"
 
         self.ctrl.view_update()
-        self.state.flush()
 
     def _update_point_labels(self):
-        """Update point labels in UI."""
+        """Update point labels in UI. Callers flush the state."""
         labels = ['point1_text', 'point2_text', 'point3_text']
         for i, key in enumerate(labels):
             if i < len(self.picked_points):
@@ -287,7 +374,6 @@ class TorusToolApp:
                 self.state[key] = f"Point {i+1}: ({p[0]:.2f}, {p[1]:.2f}, {p[2]:.2f})"
             else:
                 self.state[key] = f"Point {i+1}: -"
-        self.state.flush()
 
     def _clear_points_internal(self):
         """Clear points without updating view."""
@@ -298,44 +384,84 @@ class TorusToolApp:
         self.state.can_preview = False
         self.state.can_subtract = False
         self.state.points_count = 0
+        self._torus_cache = {}
+        self._preview_radius = None
         self._update_point_labels()
 
     def _clear_points(self):
         """Clear all picked points."""
-        self._clear_points_internal()
-        if self.source_mesh_pv is not None:
-            self.state.status_message = "Click on mesh to place Point 1"
+        with self.state:
+            self._clear_points_internal()
+            if self.source_mesh_pv is not None:
+                self.state.status_message = "Click on mesh to place Point 1"
         self.ctrl.view_update()
 
     def _on_radius_change(self):
         """Handle radius slider change."""
-        if len(self.picked_points) == 3:
-            self._show_preview()
+        if len(self.picked_points) != 3:
+            return
+        # Nothing to redraw if the preview already uses this radius
+        if float(self.state.minor_radius) == self._preview_radius:
+            return
+        self._show_preview()
+
+    def _calculate_torus(self, preview_lod=False):
+        """
+        Calculate torus (vertices, faces) arrays.
 
-    def _calculate_torus(self):
-        """Calculate torus mesh."""
+        A coarse, single-precision tessellation is used when preview_lod is
+        set; the subtraction always uses the full resolution in float64.
+        """
         if len(self.picked_points) != 3:
             return None
 
-        result = fit_circle_3d(*self.picked_points)
+        points = np.array(self.picked_points, dtype=np.float64)
+
+        # Repeated requests for the same torus are served from the cache
+        key = (points.tobytes(), float(self.state.minor_radius))
+        cached = self._torus_cache.get(preview_lod)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        # Near-collinear picks would fit a circle of enormous radius, so they
+        # are rejected along with exactly collinear ones
+        result = None if _is_near_collinear(points) else fit_circle_3d(*points)
         if result is None:
             self.state.status_message = "Error: Points are collinear!"
             return None
 
         center, major_radius, normal, _, _ = result
 
-        return generate_torus_segment(
-            center, normal, major_radius, self.state.minor_radius,
-            *self.picked_points
+        # Single precision is plenty for a translucent overlay
+        if preview_lod:
+            resolution, dtype = PREVIEW_RESOLUTION, np.float32
+        else:
+            resolution, dtype = SUBTRACT_RESOLUTION, np.float64
+        torus = torus_segment_arrays(
+            center, normal, major_radius, self.state.minor_radius, points,
+            resolution=resolution, dtype=dtype
         )
+        self._torus_cache[preview_lod] = (key, torus, None)
+        return torus
 
     def _show_preview(self):
         """Show torus preview."""
-        torus_mesh = self._calculate_torus()
-        if torus_mesh is None:
+        self._update_preview()
+        self.ctrl.view_update()
+
+    def _update_preview(self):
+        """Rebuild the torus preview actor without updating the view."""
+        torus = self._calculate_torus(preview_lod=True)
+        if torus is None:
             return
 
-        pv_mesh = pv.wrap(torus_mesh)
+        # Build the PyVista mesh straight from the arrays, once per torus;
+        # only the subtraction needs a trimesh
+        key, _, pv_mesh = self._torus_cache[True]
+        if pv_mesh is None:
+            pv_mesh = pv.PolyData.from_regular_faces(*torus)
+            self._torus_cache[True] = (key, torus, pv_mesh)
+
         self.plotter.remove_actor('torus_preview')
         self.plotter.add_mesh(
             pv_mesh,
@@ -343,59 +469,65 @@ class TorusToolApp:
             opacity=0.6,
             name='torus_preview'
         )
+        self._preview_radius = key[1]
 
         self.state.can_subtract = True
-        self.ctrl.view_update()
 
     def _perform_subtraction(self):
         """Perform boolean subtraction."""
-        torus_mesh = self._calculate_torus()
-        if torus_mesh is None:
+        torus = self._calculate_torus()
+        if torus is None:
             return
+        torus_mesh = to_trimesh(*torus)
 
         self.state.status_message = "Processing boolean subtraction..."
         self.ctrl.view_update()
 
-        result = subtract_meshes(self.source_mesh_tri, torus_mesh)
+        result, result_manifold = subtract_meshes(
+            self.source_mesh_tri, torus_mesh,
+            target_arrays=(self._verts_f32, self._faces_u32),
+            target_manifold=self._target_manifold,
+            return_manifold=True
+        )
 
         if result is None or result.is_empty:
             self.state.status_message = "Boolean operation failed! Try different points."
             return
 
+        # A torus that misses the model leaves it as it was; keep the scene
+        if self._is_unchanged(result):
+            self.state.status_message = "No intersection — try different points"
+            return
+
         # Update meshes
-        self.source_mesh_tri = result
-        self.source_mesh_pv = pv.wrap(result)
+        self._set_source_mesh(result, result_manifold)
 
-        # Redisplay
-        self.plotter.clear()
-        
-        # Ensure normals are computed for better shading
-        if self.source_mesh_pv.point_normals is None:
-            self.source_mesh_pv.compute_normals(inplace=True)
+        # Redisplay by swapping the source actor's dataset; the rest of the
+        # scene (axes, lighting, picking) stays as it is
+        self._source_actor.mapper.dataset = self.source_mesh_pv
 
-        self.plotter.add_mesh(
-            self.source_mesh_pv,
-            color='lightgrey',
-            smooth_shading=True,
-            specular=0.5,
-            name='source_mesh',
-            pickable=True
-        )
-        self.plotter.add_axes()
-        # Enable picking
-        self.plotter.disable_picking()
-        self.plotter.enable_point_picking(
-            callback=self._on_point_picked,
-            show_message=False,
-            show_point=False,
-            picker='cell',
-            left_clicking=True
-        )
-
-        self._clear_points_internal()
-        self.state.status_message = "Subtraction complete! Select more points or export."
+        with self.state:
+            self._clear_points_internal()
+            self.state.status_message = "Subtraction complete! Select more points or export."
         self.ctrl.view_update()
 
+    def _is_unchanged(self, result):
+        """
+        Returns True if result has the same vertices and face count as the
+        source mesh.
+
+        manifold3d renumbers vertices, so the vertex sets are compared in
+        sorted order; that only happens once the face counts already agree.
+        """
+        if result.faces.shape != self._faces_u32.shape:
+            return False
+        verts = np.asarray(result.vertices, dtype=np.float32)
+        if verts.shape != self._verts_f32.shape:
+            return False
+        return np.array_equal(
+            np.unique(verts, axis=0), np.unique(self._verts_f32, axis=0)
+        )
+
     def _export_stl(self):
         """Export mesh to STL file."""
         if self.source_mesh_tri is None:
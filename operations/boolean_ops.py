@@ -1,109 +1,190 @@
 """
 Boolean mesh operations using trimesh.
 """
+import logging
+
+import numpy as np
+import pyvista as pv
 import trimesh
 
+try:
+    import manifold3d
+except ImportError:  # optional; the trimesh engines are tried instead
+    manifold3d = None
+
+logger = logging.getLogger(__name__)
+
+
+def _manifold_faces(mesh):
+    """
+    Returns the faces of mesh as a contiguous uint32 array for manifold3d.
+
+    The converted array is kept in the mesh's own cache, which trimesh
+    clears whenever the mesh data changes, so repeated subtractions
+    against the same target skip the conversion.
+    """
+    faces = mesh._cache['u32_faces']
+    if faces is None:
+        faces = np.ascontiguousarray(mesh.faces, dtype=np.uint32)
+        mesh._cache['u32_faces'] = faces
+    return faces
+
+
+def _to_manifold(mesh, arrays=None):
+    """
+    Returns a manifold3d.Manifold for mesh.
+
+    Args:
+        mesh: trimesh.Trimesh object
+        arrays: optional (vertices, faces) of mesh, already float32 / uint32,
+            used instead of converting mesh
+    """
+    if arrays is not None:
+        vertices, faces = arrays
+    else:
+        vertices, faces = mesh.vertices, _manifold_faces(mesh)
+
+    # manifold3d.Mesh is the MeshGL binding: it takes C-contiguous (n, 3)
+    # float32 / uint32 arrays as they are, so no flattening is needed
+    return manifold3d.Manifold(manifold3d.Mesh(
+        vert_properties=np.ascontiguousarray(vertices, dtype=np.float32),
+        tri_verts=np.ascontiguousarray(faces, dtype=np.uint32)
+    ))
+
 
-def subtract_meshes(target_mesh, tool_mesh):
+def subtract_meshes(target_mesh, tool_mesh, target_arrays=None,
+                    target_manifold=None, return_manifold=False,
+                    allow_subprocess_engines=False):
     """
     Subtracts tool_mesh from target_mesh. Handles both solid volumes and shells.
 
     Args:
         target_mesh: trimesh.Trimesh object (the original model)
         tool_mesh: trimesh.Trimesh object (the shape to subtract)
+        target_arrays: optional (vertices, faces) of target_mesh as float32 /
+            uint32 arrays, passed to manifold3d without another conversion
+        target_manifold: optional manifold3d.Manifold of target_mesh, e.g.
+            the one returned by the previous subtraction; used instead of
+            converting target_mesh
+        return_manifold: also return the manifold3d.Manifold of the result
+        allow_subprocess_engines: also try trimesh's 'blender' and 'scad'
+            engines, which run an external program per attempt
 
     Returns:
-        trimesh.Trimesh: the result, or None if operation failed
+        trimesh.Trimesh: the result, or None if operation failed. With
+            return_manifold, a (result, result Manifold) tuple; the Manifold
+            is None unless the direct manifold3d path produced the result.
     """
-    import sys
-    import pyvista as pv
-    import numpy as np
-    
-    print(f"DEBUG: Starting subtraction. Target: {target_mesh.vertices.shape}, Tool: {tool_mesh.vertices.shape}", file=sys.stderr)
+    result, result_m = _subtract(
+        target_mesh, tool_mesh, target_arrays, target_manifold,
+        allow_subprocess_engines
+    )
+    return (result, result_m) if return_manifold else result
+
+
+def _subtract(target_mesh, tool_mesh, target_arrays, target_manifold,
+              allow_subprocess_engines):
+    """
+    Implements subtract_meshes.
+
+    Returns:
+        tuple: (result or None, result Manifold or None)
+    """
+    logger.debug("Starting subtraction. Target: %s, Tool: %s",
+                 target_mesh.vertices.shape, tool_mesh.vertices.shape)
     
+    # Edge-manifold checks, evaluated once per call
+    target_watertight = target_mesh.is_watertight
+    tool_watertight = tool_mesh.is_watertight
+
     # Check if target is a shell (not watertight)
-    if not target_mesh.is_watertight:
-        print("DEBUG: Target is a shell. Using PyVista clip_surface...", file=sys.stderr)
+    if not target_watertight:
+        logger.debug("Target is a shell. Using PyVista clip_surface...")
         try:
             # Convert to PyVista
             target_pv = pv.wrap(target_mesh)
             tool_pv = pv.wrap(tool_mesh)
             
-            # clip_surface with invert=True removes the part of target_pv that is INSIDE tool_pv
+            # clip_surface with invert=False removes the part of target_pv that is INSIDE tool_pv
             # This is exactly what subtraction from a shell means.
-            result_pv = target_pv.clip_surface(tool_pv, invert=True)
+            result_pv = target_pv.clip_surface(tool_pv, invert=False)
             
             # Convert back to trimesh
-            # result_pv is usually a PolyData
-            result = trimesh.Trimesh(vertices=result_pv.points, faces=result_pv.faces.reshape(-1, 4)[:, 1:])
+            # clip_surface can return mixed polygons, so triangulate before
+            # taking the (N, 3) face array; PyVista already cleaned the
+            # mesh, so skip trimesh's processing pass
+            result_tri = result_pv.triangulate()
+            result = trimesh.Trimesh(
+                vertices=result_tri.points,
+                faces=result_tri.regular_faces,
+                process=False
+            )
             
             if not result.is_empty:
-                print(f"DEBUG: PyVista clipping success! Result: {result.vertices.shape}", file=sys.stderr)
-                return result
+                logger.debug("PyVista clipping success! Result: %s", result.vertices.shape)
+                return result, None
             else:
-                print("DEBUG: PyVista clipping returned an empty mesh.", file=sys.stderr)
+                logger.debug("PyVista clipping returned an empty mesh.")
         except Exception as e:
-            print(f"DEBUG: PyVista clipping failed: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.debug("PyVista clipping failed: %s", e, exc_info=True)
 
     # Try direct manifold3d path for solid-solid subtraction
-    try:
-        import manifold3d
-        from manifold3d import Manifold, Mesh
-        print("DEBUG: Trying direct manifold3d interface...", file=sys.stderr)
-        
-        # Convert target
-        target_m = Manifold(Mesh(
-            vert_properties=np.array(target_mesh.vertices, dtype=np.float32),
-            tri_verts=np.array(target_mesh.faces, dtype=np.uint32)
-        ))
-        
-        # Convert tool
-        tool_m = Manifold(Mesh(
-            vert_properties=np.array(tool_mesh.vertices, dtype=np.float32),
-            tri_verts=np.array(tool_mesh.faces, dtype=np.uint32)
-        ))
+    if manifold3d is not None:
+        try:
+            logger.debug("Trying direct manifold3d interface...")
         
-        # Operation
-        result_m = target_m - tool_m
+            # Convert target, unless the caller kept its Manifold
+            if target_manifold is not None:
+                target_m = target_manifold
+            else:
+                target_m = _to_manifold(target_mesh, target_arrays)
+
+            # Convert tool
+            tool_m = _to_manifold(tool_mesh)
         
-        # Convert back
-        res_mesh_data = result_m.to_mesh()
-        result = trimesh.Trimesh(
-            vertices=res_mesh_data.vert_properties, 
-            faces=res_mesh_data.tri_verts
-        )
+            # Operation
+            result_m = target_m - tool_m
         
-        if not result.is_empty:
-             print(f"DEBUG: Direct manifold3d success! Result: {result.vertices.shape}", file=sys.stderr)
-             return result
-        else:
-             print("DEBUG: Direct manifold3d returned an empty mesh.", file=sys.stderr)
+            # Convert back; an empty result is detected on the raw buffers,
+            # before trimesh builds anything from them. manifold3d output is
+            # already merged and manifold, so skip trimesh's processing pass
+            res_mesh_data = result_m.to_mesh()
+            if res_mesh_data.tri_verts.shape[0] > 0:
+                result = trimesh.Trimesh(
+                    vertices=res_mesh_data.vert_properties,
+                    faces=res_mesh_data.tri_verts,
+                    process=False
+                )
+                logger.debug("Direct manifold3d success! Result: %s", result.vertices.shape)
+                return result, result_m
+            else:
+                logger.debug("Direct manifold3d returned an empty mesh.")
              
-    except Exception as e:
-        print(f"DEBUG: Direct manifold3d failed: {e}", file=sys.stderr)
+        except Exception as e:
+            logger.debug("Direct manifold3d failed: %s", e)
 
     # Fallback to trimesh engines for watertight meshes
-    if target_mesh.is_watertight and tool_mesh.is_watertight:
-        engines = ['manifold', 'blender', 'scad']
+    if target_watertight and tool_watertight:
+        engines = ['manifold']
+        if allow_subprocess_engines:
+            engines += ['blender', 'scad']
         for engine in engines:
             try:
-                print(f"DEBUG: Trying engine '{engine}'...", file=sys.stderr)
+                logger.debug("Trying engine '%s'...", engine)
                 result = trimesh.boolean.difference(
                     [target_mesh, tool_mesh],
                     engine=engine
                 )
                 if result is not None and not result.is_empty:
-                    print(f"DEBUG: Engine '{engine}' success! Result: {result.vertices.shape}", file=sys.stderr)
-                    return result
+                    logger.debug("Engine '%s' success! Result: %s", engine, result.vertices.shape)
+                    return result, None
             except Exception as e:
-                print(f"Boolean engine '{engine}' failed: {e}", file=sys.stderr)
+                logger.warning("Boolean engine '%s' failed: %s", engine, e)
                 continue
 
     # If all engines fail, return None
-    print("All boolean operations failed", file=sys.stderr)
-    return None
+    logger.warning("All boolean operations failed")
+    return None, None
 
 
 def check_mesh_validity(mesh):